@@ -35,6 +35,8 @@ def parse_args():
                         help="Экспорт данных в CSV (all/phones/runs/clients/latest)")
     parser.add_argument("--continue", dest='resume', action='store_true',
                         help="Продолжить прерванный сбор")
+    parser.add_argument("--compress", action='store_true',
+                        help="Сжимать экспорт в .csv.gz")
     
     return parser.parse_args()
 
@@ -62,7 +64,7 @@ def main():
 
     # Если запрошен экспорт
     if args.export:
-        exporter = CSVExporter(db)
+        exporter = CSVExporter(db, compress=args.compress)
         logger.info(f"Starting export: {args.export}")
         
         try:
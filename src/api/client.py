@@ -1,7 +1,8 @@
 """DataMaster API Client"""
 import requests
 import logging
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional
 from dataclasses import dataclass
 from src.utils.retry import retry
 
@@ -31,12 +32,20 @@ class DataMasterAPIError(Exception):
     pass
 
 
+def _client_stop_event(client: "DataMasterClient", *args, **kwargs) -> Optional[threading.Event]:
+    """Событие остановки экземпляра — для прерывания пауз @retry."""
+    return client.stop_event
+
+
 class DataMasterClient:
-    def __init__(self, api_url: str, token: str, timeout: int = 30, max_retries: int = 3):
+    def __init__(self, api_url: str, token: str, timeout: int = 30, max_retries: int = 3,
+                 stop_event: Optional[threading.Event] = None):
         self.api_url = api_url
         self.token = token
         self.timeout = timeout
         self.max_retries = max_retries
+        # При установке прерывает паузу между повторами (RetryAborted)
+        self.stop_event = stop_event
         
         # Настройка session с connection pooling и retry
         self.session = requests.Session()
@@ -63,7 +72,8 @@ class DataMasterClient:
         self.session.mount('https://', adapter)
 
 
-    @retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(requests.exceptions.RequestException,))
+    @retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(requests.exceptions.RequestException,), jitter=0.5,
+           stop_event=_client_stop_event)
     def _make_request(self, command: str, **params) -> Dict:
         """
         Выполнить API-запрос с автоматическими повторами при сбоях.
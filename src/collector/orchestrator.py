@@ -5,6 +5,7 @@ from src.api.client import DataMasterClient
 from src.database.manager import DatabaseManager
 from src.collector.state_manager import StateManager
 from src.collector.normalizer import PhoneNormalizer
+from src.utils.retry import RetryAborted
 from datetime import datetime
 
 
@@ -27,7 +28,12 @@ class CollectionOrchestrator:
         resume: bool = False,
         stop_callback=None,
         progress_callback=None,
+        stop_event=None,
     ):
+        # stop_event (threading.Event) позволяет прерывать паузы rate limit
+        if stop_event is not None and stop_callback is None:
+            stop_callback = stop_event.is_set
+
         processed_client_ids = set()
         start_time = datetime.now()
         if resume:
@@ -45,6 +51,9 @@ class CollectionOrchestrator:
             run_id = self.db.create_run()
             stats = {'total_phones': 0, 'new_phones': 0, 'errors': 0, 'projects_count': 0}
 
+        # Пока список клиентов не получен (остановка во время get_clients)
+        total_clients_original = 0
+
         try:
             all_clients_list = self.api.get_clients()
             total_clients_original = len(all_clients_list)
@@ -116,7 +125,10 @@ class CollectionOrchestrator:
                                 progress_callback(idx, total_clients, stats)
                                 
                             page += 1
-                            time.sleep(self.rate_limit)
+                            if stop_event is not None:
+                                stop_event.wait(self.rate_limit)
+                            else:
+                                time.sleep(self.rate_limit)
 
                     processed_client_ids.add(client.id)
                     # Every client update state
@@ -130,6 +142,10 @@ class CollectionOrchestrator:
                             stats['total_phones']
                         )
 
+                except RetryAborted:
+                    logger.info(f"Collection stopped by user at client {idx} (retry aborted)")
+                    self.save_state(run_id, total_clients_original, processed_client_ids, stats)
+                    return "stopped"
                 except Exception as e:
                     logger.error(f"Error client {client.id}: {e}")
                     stats['errors'] += 1
@@ -154,6 +170,11 @@ class CollectionOrchestrator:
             self.state_manager.clear()
             return "completed"
 
+        except RetryAborted:
+            # Stop во время паузы retry вне цикла по клиентам (например, в get_clients)
+            logger.info("Collection stopped by user during retry backoff")
+            self.save_state(run_id, total_clients_original, processed_client_ids, stats)
+            return "stopped"
         except Exception as e:
             logger.error(f"Orchestrator failed: {e}")
             self.db.update_run_stats(run_id, stats['total_phones'], stats['new_phones'], 'failed', stats['errors'])
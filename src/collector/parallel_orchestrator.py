@@ -9,6 +9,8 @@ from typing import Optional, Callable
 
 from src.collector.normalizer import PhoneNormalizer
 from src.collector.state_manager import StateManager
+from src.database.manager import DatabaseManager
+from src.utils.retry import RetryAborted
 
 
 logger = logging.getLogger(__name__)
@@ -22,17 +24,30 @@ class RateLimiter:
         self.lock = threading.Lock()
         self.last_request_time = 0
     
-    def wait(self):
-        """Ждёт необходимое время перед следующим запросом."""
+    def wait(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """Ждёт необходимое время перед следующим запросом.
+
+        Если передан stop_event, ожидание прерывается сразу после его установки.
+        Возвращает True, если ожидание прервано остановкой: запрос делать нельзя,
+        last_request_time при этом не сдвигается.
+        """
         with self.lock:
+            if stop_event is not None and stop_event.is_set():
+                return True
+            
             current_time = time.time()
             time_since_last = current_time - self.last_request_time
             
             if time_since_last < self.delay:
                 sleep_time = self.delay - time_since_last
-                time.sleep(sleep_time)
+                if stop_event is not None:
+                    if stop_event.wait(sleep_time):
+                        return True
+                else:
+                    time.sleep(sleep_time)
             
             self.last_request_time = time.time()
+            return False
 
 
 class ParallelOrchestrator:
@@ -73,8 +88,12 @@ class ParallelOrchestrator:
         resume: bool = False,
         stop_callback: Optional[Callable] = None,
         progress_callback: Optional[Callable] = None,
+        stop_event: Optional[threading.Event] = None,
     ):
         """Главный метод сбора с параллелизацией."""
+        if stop_event is not None and stop_callback is None:
+            stop_callback = stop_event.is_set
+
         processed_client_ids = set()
         start_time = datetime.now()
         
@@ -94,6 +113,9 @@ class ParallelOrchestrator:
             run_id = self.db.create_run()
             stats = {'total_phones': 0, 'new_phones': 0, 'errors': 0, 'projects_count': 0}
         
+        # Пока список клиентов не получен (остановка во время get_clients)
+        total_clients_original = 0
+
         try:
             # Получаем список клиентов
             all_clients_list = self.api.get_clients()
@@ -126,7 +148,8 @@ class ParallelOrchestrator:
                         run_id,
                         limit_projects,
                         max_pages,
-                        stop_callback
+                        stop_callback,
+                        stop_event
                     ): (client, idx)
                     for idx, client in enumerate(all_clients_list, 1)
                 }
@@ -175,6 +198,9 @@ class ParallelOrchestrator:
                             
                             progress_callback(completed_count, total_clients, stats)
 
+                    except RetryAborted:
+                        # Остановка во время паузы retry — не ошибка, клиент не обработан
+                        logger.info(f"Client {client.id} interrupted by stop request")
                     except Exception as e:
                         logger.error(f"Error processing client {client.id}: {e}")
                         with self.stats_lock:
@@ -201,6 +227,11 @@ class ParallelOrchestrator:
             self.state_manager.clear()
             return "completed"
             
+        except RetryAborted:
+            # Stop во время паузы retry вне цикла по клиентам (например, в get_clients)
+            logger.info("Collection stopped by user during retry backoff")
+            self.save_state(run_id, total_clients_original, processed_client_ids, stats)
+            return "stopped"
         except Exception as e:
             logger.error(f"Orchestrator failed: {e}")
             self.db.update_run_stats(run_id, stats['total_phones'], stats['new_phones'], 'failed', stats['errors'])
@@ -212,11 +243,10 @@ class ParallelOrchestrator:
         run_id: int,
         limit_projects: Optional[int],
         max_pages: Optional[int],
-        stop_callback: Optional[Callable]
+        stop_callback: Optional[Callable],
+        stop_event: Optional[threading.Event] = None
     ) -> dict:
         """Обработка одного клиента (выполняется в отдельном потоке)."""
-        from src.database.manager import DatabaseManager
-        
         client_stats = {'phones': 0, 'new_phones': 0, 'projects': 0}
         
         # Увеличиваем счётчик активных воркеров
@@ -230,19 +260,17 @@ class ParallelOrchestrator:
         thread_db = DatabaseManager(self.db_path)
         thread_db.connect()
         
-        # Создаём отдельное подключение к БД для этого потока
-        thread_db = DatabaseManager(self.db.db_path)
-        thread_db.connect()
-        
         try:
             logger.info(f"[Worker-{threading.current_thread().name}] Processing client: {client.username}")
             
-            # Вставка клиента
-            self.rate_limiter.wait()
+            # Вставка клиента (при остановке клиент остаётся необработанным)
+            if self.rate_limiter.wait(stop_event):
+                return client_stats
             thread_db.insert_client(client.id, client.username)
             
             # Получение проектов
-            self.rate_limiter.wait()
+            if self.rate_limiter.wait(stop_event):
+                return client_stats
             projects = self.api.get_projects(client.id)
             
             if limit_projects:
@@ -253,7 +281,8 @@ class ParallelOrchestrator:
                 if stop_callback and stop_callback():
                     break
                 
-                self.rate_limiter.wait()
+                if self.rate_limiter.wait(stop_event):
+                    break
                 thread_db.insert_project(project.id, project.name, client.id)
                 client_stats['projects'] += 1
                 
@@ -266,7 +295,8 @@ class ParallelOrchestrator:
                     if max_pages and page > max_pages:
                         break
                     
-                    self.rate_limiter.wait()
+                    if self.rate_limiter.wait(stop_event):
+                        break
                     phones = self.api.get_phones(project.id, page)
                     
                     if not phones:
@@ -314,6 +344,8 @@ class ParallelOrchestrator:
             
             return client_stats
             
+        except RetryAborted:
+            raise
         except Exception as e:
             logger.error(f"Error in client {client.id}: {e}")
             raise
@@ -2,17 +2,30 @@
 import sqlite3
 import logging
 import os
+import queue
+import threading
 from typing import Optional, Dict
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+# Максимум подключений только для чтения в пуле read_cursor
+READ_POOL_SIZE = 4
+
 class DatabaseManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.connection = None
+        
+        # Пул подключений для чтения: создаются по требованию, переиспользуются
+        self._read_pool = queue.LifoQueue()
+        self._read_pool_lock = threading.Lock()
+        self._read_conns = 0
+        self._closed = False
 
     def connect(self):
+        with self._read_pool_lock:
+            self._closed = False
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
         self.connection.row_factory = sqlite3.Row
@@ -28,6 +41,17 @@ class DatabaseManager:
         logger.info("Database connected with WAL mode enabled")
 
     def close(self):
+        # Подключения, выданные сейчас через read_cursor(), закроются при возврате
+        with self._read_pool_lock:
+            self._closed = True
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._read_pool_lock:
+                self._read_conns -= 1
+        
         if self.connection:
             self.connection.close()
 
@@ -41,10 +65,93 @@ class DatabaseManager:
             self.connection.rollback()
             raise
 
+    @contextmanager
+    def read_cursor(self, arraysize: Optional[int] = None):
+        """
+        Курсор только для чтения на подключении из пула.
+        
+        В режиме WAL читатели не блокируют друг друга и запись, поэтому такие
+        курсоры можно открывать из нескольких потоков одновременно (экспорт).
+        
+        Серверных курсоров у SQLite нет, но они и не нужны: курсор sqlite3
+        читает строки по мере fetch* (sqlite3_step), весь результат в памяти
+        не собирается. arraysize задаёт размер пачки fetchmany() без аргумента.
+        """
+        conn = self._acquire_read_connection()
+        cursor = conn.cursor()
+        if arraysize:
+            cursor.arraysize = arraysize
+        try:
+            yield cursor
+        finally:
+            # close() сбрасывает недочитанный SELECT, подключение можно отдавать дальше
+            cursor.close()
+            self._release_read_connection(conn)
+
+    def _release_read_connection(self, conn: sqlite3.Connection):
+        with self._read_pool_lock:
+            if not self._closed:
+                self._read_pool.put(conn)
+                return
+            self._read_conns -= 1
+        # Менеджер закрыт, пока курсор был в работе — в пул не возвращаем
+        conn.close()
+
+    def _acquire_read_connection(self) -> sqlite3.Connection:
+        try:
+            return self._read_pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._read_pool_lock:
+            can_open = self._read_conns < READ_POOL_SIZE
+            if can_open:
+                self._read_conns += 1
+        
+        if not can_open:
+            # Пул исчерпан — ждём, пока другой поток вернёт подключение
+            return self._read_pool.get()
+        
+        try:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            return conn
+        except Exception:
+            with self._read_pool_lock:
+                self._read_conns -= 1
+            raise
+
     def _create_schema(self):
+        # run_export_cache появился позже остальных таблиц: проверяем до миграции
+        cache_existed = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'run_export_cache'"
+        ).fetchone() is not None
+        
         schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
         with open(schema_path, 'r', encoding='utf-8') as f:
             self.connection.executescript(f.read())
+        
+        if not cache_existed:
+            self._backfill_run_export_cache()
+
+    def _backfill_run_export_cache(self):
+        """
+        Однократное заполнение run_export_cache связями, записанными до появления
+        триггера (в том числе для запусков, которые продолжат через --continue).
+        """
+        with self.get_cursor() as cursor:
+            cursor.execute("""
+                INSERT OR IGNORE INTO run_export_cache
+                    (run_id, phone_id, project_id, phone, first_seen_at, project_name, client_name)
+                SELECT pp.run_id, pp.phone_id, pp.project_id, p.phone, p.first_seen_at, pr.name, c.username
+                FROM project_phones pp
+                JOIN phones p ON p.id = pp.phone_id
+                JOIN projects pr ON pr.id = pp.project_id
+                JOIN clients c ON c.id = pr.client_id
+            """)
+            if cursor.rowcount > 0:
+                logger.info(f"run_export_cache backfilled with {cursor.rowcount} rows")
 
     def create_run(self) -> int:
         with self.get_cursor() as cursor:
@@ -308,12 +415,15 @@ class DatabaseManager:
                 CREATE INDEX IF NOT EXISTS idx_phones_phone ON phones(phone)
             """)
             
-            # Копируем данные из основной БД
-            phones_data = self.connection.execute("""
-                SELECT phone, original_format, first_seen_at, first_run_id
-                FROM phones
-                ORDER BY id
-            """).fetchall()
+            # Копируем данные из основной БД через подключение только для чтения:
+            # основное подключение может быть занято транзакциями сбора
+            with self.read_cursor() as read_cursor:
+                read_cursor.execute("""
+                    SELECT phone, original_format, first_seen_at, first_run_id
+                    FROM phones
+                    ORDER BY id
+                """)
+                phones_data = read_cursor.fetchall()
             
             # Вставляем в новую БД
             export_cursor.executemany("""
@@ -59,3 +59,31 @@ CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
 CREATE INDEX IF NOT EXISTS idx_projects_client ON projects(client_id);
 CREATE INDEX IF NOT EXISTS idx_phones_run ON phones(first_run_id);
 
+-- Denormalized export cache: rows of export_latest_run without joins
+CREATE TABLE IF NOT EXISTS run_export_cache (
+    run_id INTEGER NOT NULL,
+    phone_id INTEGER NOT NULL,
+    project_id INTEGER NOT NULL,
+    phone TEXT NOT NULL,
+    first_seen_at TIMESTAMP,
+    project_name TEXT,
+    client_name TEXT,
+    PRIMARY KEY (run_id, phone_id, project_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_run_export_cache_seen ON run_export_cache(run_id, first_seen_at);
+
+-- Filled on every new project-phone link (single and batch inserts, any connection);
+-- links written before this table existed are backfilled once by DatabaseManager
+CREATE TRIGGER IF NOT EXISTS trg_project_phones_export_cache
+AFTER INSERT ON project_phones
+BEGIN
+    INSERT OR IGNORE INTO run_export_cache
+        (run_id, phone_id, project_id, phone, first_seen_at, project_name, client_name)
+    SELECT NEW.run_id, NEW.phone_id, NEW.project_id, p.phone, p.first_seen_at, pr.name, c.username
+    FROM phones p
+    JOIN projects pr ON pr.id = NEW.project_id
+    JOIN clients c ON c.id = pr.client_id
+    WHERE p.id = NEW.phone_id;
+END;
+
@@ -1,60 +1,119 @@
 """Main GUI Application"""
 import customtkinter as ctk
+import tkinter.messagebox as messagebox
 import threading
 import logging
+import collections
 import os
 import json
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache, partial
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from src.api.client import DataMasterClient
-from src.reports.exporter import CSVExporter
-from src.database.manager import DatabaseManager
-from src.collector.state_manager import StateManager
-from src.notifications.telegram_bot import TelegramNotifier
-from src.collector.orchestrator import CollectionOrchestrator
-from src.collector.parallel_orchestrator import ParallelOrchestrator  
+
+# Модули сбора/экспорта (requests, sqlite3, оркестраторы) импортируются
+# при первом использовании, чтобы не замедлять первый показ окна
+if TYPE_CHECKING:
+    from src.database.manager import DatabaseManager
+    from src.reports.exporter import CSVExporter
 
 # Настройка темы
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Тип сообщения -> диалог tkinter (по умолчанию showinfo)
+_MESSAGE_BOXES = {
+    'success': messagebox.showinfo,
+    'error': messagebox.showerror,
+}
+
+# Период опроса очереди UI: ~30 кадров в секунду
+_UI_POLL_MS = 33
+
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """Снимок настроек на момент запуска сбора (собирается в главном потоке)"""
+    api_url: str
+    api_token: str
+    timeout: int
+    max_retries: int
+    rate_limit: float
+    telegram_token: str | None
+    telegram_chat_id: str | None
+    telegram_enabled: bool
+    parallel: bool
+    workers: int
+
+
 class TextHandler(logging.Handler):
-    """Handler для вывода логов в текстовый виджет"""
+    """
+    Handler для вывода логов в текстовый виджет (пачками раз в 100 мс).
     
-    def __init__(self, text_widget):
+    emit только кладёт строку в очередь, а виджет обновляет таймер главного
+    потока: поток QueueListener не обращается к Tk и не может зависнуть на нём.
+    Создавать в главном потоке.
+    """
+    
+    def __init__(self, text_widget, max_batch: int = 500, max_lines: int = 2000,
+                 poll_ms: int = 100):
         super().__init__()
         self.text_widget = text_widget
+        self.max_batch = max_batch
+        self.max_lines = max_lines
+        self.poll_ms = poll_ms
+        # deque: append/popleft атомарны под GIL, отдельный lock не нужен
+        self._queue = collections.deque()
+        self._job = text_widget.after(poll_ms, self._drain)
     
     def emit(self, record):
-        msg = self.format(record)
+        self._queue.append(self.format(record))
+    
+    def close(self):
+        """Остановка таймера (вызывать из главного потока)."""
+        if self._job:
+            try:
+                self.text_widget.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+        super().close()
+    
+    def _drain(self):
+        popleft = self._queue.popleft
+        batch = []
+        try:
+            for _ in range(self.max_batch):
+                batch.append(popleft().rstrip('\n'))
+        except IndexError:
+            pass
         
-        def append():
+        if batch:
             try:
                 self.text_widget.configure(state='normal')
+                self.text_widget.insert('end', '\n'.join(batch) + '\n')
                 
-                # Принудительно добавляем перенос строки
-                if not msg.endswith('\n'):
-                    full_msg = msg + '\n'
-                else:
-                    full_msg = msg
-                
-                # Вставляем текст
-                self.text_widget.insert('end', full_msg)
+                # Держим в виджете только последние max_lines строк
+                line_count = int(self.text_widget.index('end-1c').split('.')[0])
+                if line_count > self.max_lines:
+                    self.text_widget.delete('1.0', f'{line_count - self.max_lines}.0')
                 
                 # Автопрокрутка вниз
                 self.text_widget.see('end')
                 
                 # Блокируем редактирование
                 self.text_widget.configure(state='disabled')
-            except Exception as e:
+            except Exception:
                 # Игнорируем ошибки (например, если виджет уже уничтожен)
-                pass
+                self._job = None
+                return
         
-        # Используем after для потокобезопасности
-        try:
-            self.text_widget.after(0, append)
-        except Exception:
-            pass
+        self._job = self.text_widget.after(self.poll_ms, self._drain)
 
 
 class App(ctk.CTk):
@@ -73,6 +132,7 @@ class App(ctk.CTk):
         
         # Telegram настройки
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
+        self._token_display = "***" + (self.telegram_token[-10:] if self.telegram_token and len(self.telegram_token) > 10 else "NOT SET")
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
         self.telegram_enabled = os.getenv('TELEGRAM_ENABLED', 'false').lower() == 'true'
         
@@ -81,8 +141,47 @@ class App(ctk.CTk):
         self.workers_count = int(os.getenv('WORKERS_COUNT', '5'))
 
         # Состояние
-        self.collection_thread = None
-        self.is_collecting = False
+        # Сбор выполняется в одном постоянном фоновом потоке
+        self._collection_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="collection")
+        self._collection_future = None
+        self._stop_event = threading.Event()     # запрос остановки сбора
+        self._running_event = threading.Event()  # сбор выполняется
+        self._dashboard_dirty = False  # Dashboard устарел, пока вкладка скрыта
+
+        # Передача данных из рабочих потоков в UI; разбирается в _drain_queue
+        self._ui_q = queue.Queue()
+        self._last_progress = None   # последнее состояние прогресса от воркеров
+        self._shown_progress = None  # состояние, которое уже отрисовано
+        self._drain_job = None
+        self._stats_tmpl = "Total: {total_phones} | New: {new_phones} | Errors: {errors_count}{worker_info}"
+
+        # Последние выведенные значения: повторная запись в Tk пропускается
+        self._progress_text = "Ready to start"
+        self._stats_text = "Total: 0 | New: 0 | Errors: 0"
+        self._bar_value = 0.0
+
+        # Пул для фоновых задач GUI (экспорт, Dashboard) вместо потока на каждый клик
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gui-bg")
+        self._export_future = None
+
+        # Общее подключение к БД, открывается при первом обращении
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._exporter = None
+
+        # Клиенты API/Telegram переиспользуются между запусками сбора
+        self._api_client = None
+        self._api_client_key = None
+        self._notifier = None
+        self._notifier_key = None
+
+        # Кэш .env: читается один раз, сохранения только пишут файл
+        self._env_path = Path(".env")
+        self._env_lock = threading.Lock()  # сериализует сохранения .env
+        self._load_env_cache()
+
+        # Кэш шрифтов (size, weight) -> CTkFont, общий для всех виджетов
+        self._fonts = {}
 
         # Настройка окна
         self.title("DataMaster Phone Collector")
@@ -90,31 +189,117 @@ class App(ctk.CTk):
 
         self.setup_logging()
         self.create_widgets()
+        self.start_log_listener()
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self._drain_job = self.after(_UI_POLL_MS, self._drain_queue)
+
+    def on_close(self):
+        """Закрытие окна; фоновые задачи дожидаемся уже после выхода из mainloop."""
+        self._stop_event.set()
+        if self._drain_job:
+            self.after_cancel(self._drain_job)
+            self._drain_job = None
+        self._text_handler.close()
+        # Здесь не ждём: обработчик Tk не должен блокироваться на рабочих потоках
+        self._collection_pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
+    def mainloop(self, *args, **kwargs):
+        try:
+            super().mainloop(*args, **kwargs)
+        finally:
+            self._release_resources()
+
+    def _release_resources(self):
+        """Ожидание фоновых задач и закрытие БД/клиентов (вне обработчиков Tk)."""
+        self._stop_event.set()
+        # Дожидаемся задач, чтобы не закрыть БД под ними
+        self._collection_pool.shutdown(wait=True, cancel_futures=True)
+        self._io_pool.shutdown(wait=True)
+        if self._api_client:
+            self._api_client.close()
+            self._api_client = None
+        if self._notifier:
+            self._notifier.close()
+            self._notifier = None
+        with self._db_lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+        if self._log_listener:
+            self._log_listener.stop()
+            self._log_listener = None
+
+    def _get_db(self) -> "DatabaseManager":
+        """Общий DatabaseManager приложения (подключается один раз)."""
+        from src.database.manager import DatabaseManager
+        
+        with self._db_lock:
+            if self._db is None:
+                db = DatabaseManager(self.db_path)
+                db.connect()
+                self._db = db
+            return self._db
+
+    def _get_exporter(self) -> "CSVExporter":
+        """CSVExporter общей БД (читает через отдельные подключения read_cursor)."""
+        from src.reports.exporter import CSVExporter
+        
+        if self._exporter is None:
+            self._exporter = CSVExporter(self._get_db())
+        return self._exporter
 
     def setup_logging(self):
         log_file = os.getenv('LOGFILE', 'logs/collector.log')
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        # Пустой dirname (LOGFILE без каталога) ломает makedirs
+        log_dir = os.path.dirname(log_file) or "."
+        if log_dir != "." and not os.path.isdir(log_dir):
+            os.makedirs(log_dir, exist_ok=True)
+        
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        
+        # Потоки только кладут записи в очередь; файл, консоль и GUI
+        # обслуживает QueueListener (запускается после create_widgets)
+        self._log_handlers = [file_handler, stream_handler]
+        self._log_queue = queue.Queue(-1)
+        self._log_listener = None
         
-        # Основной конфиг логов
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
+        logger = logging.getLogger()
+        logger.setLevel(logging.INFO)
+        if not any(isinstance(h, QueueHandler) for h in logger.handlers):
+            logger.addHandler(QueueHandler(self._log_queue))
+
+    def start_log_listener(self):
+        """Запуск потока, который пишет логи из очереди во все обработчики."""
+        self._log_listener = QueueListener(
+            self._log_queue, *self._log_handlers, respect_handler_level=True
         )
+        self._log_listener.start()
+
+    def _font(self, size: int, weight: str = "normal") -> ctk.CTkFont:
+        """Общий экземпляр CTkFont для пары (size, weight)."""
+        key = (size, weight)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = ctk.CTkFont(size=size, weight=weight)
+        return font
 
     def create_widgets(self):
         # Header
         self.header = ctk.CTkLabel(
             self, text="📊 DataMaster Phone Collector", 
-            font=ctk.CTkFont(size=24, weight="bold")
+            font=self._font(24, "bold")
         )
         self.header.pack(pady=20)
 
         # Tabview
-        self.tabview = ctk.CTkTabview(self, width=900, height=600)
+        self.tabview = ctk.CTkTabview(self, width=900, height=600, command=self._on_tab_change)
         self.tabview.pack(pady=10, padx=20, fill="both", expand=True)
 
         self.tab_dashboard = self.tabview.add("Dashboard")
@@ -126,6 +311,11 @@ class App(ctk.CTk):
         self.create_collection_tab()
         self.create_export_tab()
         self.create_settings_tab()
+
+    def _on_tab_change(self):
+        """Отложенное обновление Dashboard при переходе на вкладку."""
+        if self.tabview.get() == "Dashboard" and self._dashboard_dirty:
+            self.after(0, self.refresh_dashboard)
     
     def create_dashboard_tab(self):
         """Создание вкладки Dashboard."""
@@ -137,7 +327,7 @@ class App(ctk.CTk):
         header = ctk.CTkLabel(
             dashboard_frame,
             text="📊 Collection Dashboard",
-            font=ctk.CTkFont(size=20, weight="bold")
+            font=self._font(20, "bold")
         )
         header.pack(pady=10)
         
@@ -148,7 +338,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             stats_section,
             text="Overall Statistics",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         ).pack(pady=5)
         
         # Контейнер для метрик (4 колонки)
@@ -168,13 +358,13 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             last_run_section,
             text="Last Run",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         ).pack(pady=5)
         
         self.last_run_info = ctk.CTkLabel(
             last_run_section,
             text="No runs yet",
-            font=ctk.CTkFont(size=12),
+            font=self._font(12),
             justify="left"
         )
         self.last_run_info.pack(pady=10, padx=20, anchor="w")
@@ -186,13 +376,13 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             performance_section,
             text="Performance Stats (Last 5 Runs)",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         ).pack(pady=5)
         
         self.performance_info = ctk.CTkLabel(
             performance_section,
             text="No completed runs yet",
-            font=ctk.CTkFont(size=12),
+            font=self._font(12),
             justify="left"
         )
         self.performance_info.pack(pady=10, padx=20, anchor="w")
@@ -204,7 +394,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             graph_section,
             text="Collection Trend (Last 10 Runs)",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         ).pack(pady=5)
 
         # Canvas для графика
@@ -227,7 +417,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             history_section,
             text="Recent Runs History",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         ).pack(pady=5)
         
         # Таблица истории
@@ -256,14 +446,14 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             card,
             text=label,
-            font=ctk.CTkFont(size=11),
+            font=self._font(11),
             text_color="gray"
         ).pack(pady=(10, 0))
         
         value_label = ctk.CTkLabel(
             card,
             text=value,
-            font=ctk.CTkFont(size=24, weight="bold")
+            font=self._font(24, "bold")
         )
         value_label.pack(pady=(0, 10))
         
@@ -271,10 +461,19 @@ class App(ctk.CTk):
 
     def refresh_dashboard(self):
         """Обновление данных Dashboard."""
+        # Не трогаем БД, пока вкладка скрыта — обновимся при переключении
+        if self.tabview.get() != "Dashboard":
+            self._dashboard_dirty = True
+            return
+        self._dashboard_dirty = False
+
+        # Виджеты обновляет _drain_queue в главном потоке: рабочий поток не
+        # вызывает Tk и не блокирует закрытие окна
         def do_refresh():
             db = None
             try:
                 logging.info("Starting dashboard refresh...")
+                from src.database.manager import DatabaseManager
                 db = DatabaseManager(self.db_path)
                 logging.info(f"DatabaseManager created, db_path={self.db_path}")
 
@@ -286,17 +485,16 @@ class App(ctk.CTk):
                 stats = db.get_total_stats()
                 logging.info(f"Total stats: {stats}")
                 
-                self.after(0, lambda: self.metric_clients.configure(text=f"{stats['total_clients']:,}"))
-                self.after(0, lambda: self.metric_projects.configure(text=f"{stats['total_projects']:,}"))
-                self.after(0, lambda: self.metric_phones.configure(text=f"{stats['total_phones']:,}"))
-                self.after(0, lambda: self.metric_unique.configure(text=f"{stats['total_unique_phones']:,}"))
+                self._ui_q.put(('call', partial(self.metric_clients.configure, text=f"{stats['total_clients']:,}")))
+                self._ui_q.put(('call', partial(self.metric_projects.configure, text=f"{stats['total_projects']:,}")))
+                self._ui_q.put(('call', partial(self.metric_phones.configure, text=f"{stats['total_phones']:,}")))
+                self._ui_q.put(('call', partial(self.metric_unique.configure, text=f"{stats['total_unique_phones']:,}")))
                 
                 # Последний запуск
                 if stats['last_run']:
                     lr = stats['last_run']
                     duration = "N/A"
                     if lr.get('completed_at'):  # ← Используй .get() для безопасности
-                        from datetime import datetime
                         try:
                             start = datetime.fromisoformat(lr['started_at'])
                             end = datetime.fromisoformat(lr['completed_at'])
@@ -314,7 +512,7 @@ class App(ctk.CTk):
                 else:
                     last_run_text = "No runs yet"
 
-                self.after(0, lambda: self.last_run_info.configure(text=last_run_text))
+                self._ui_q.put(('call', partial(self.last_run_info.configure, text=last_run_text)))
                 
                 # Производительность
                 perf = db.get_collection_speed_stats()
@@ -328,12 +526,12 @@ class App(ctk.CTk):
                 else:
                     perf_text = "No completed runs yet"
                 
-                self.after(0, lambda: self.performance_info.configure(text=perf_text))
+                self._ui_q.put(('call', partial(self.performance_info.configure, text=perf_text)))
                 
                 # История запусков
                 history = db.get_runs_history(10)
                 if history:
-                    self.after(0, lambda: self.draw_collection_graph(history))
+                    self._ui_q.put(('call', partial(self.draw_collection_graph, history)))
                 history_lines = ["ID | Start Time              | Status      | Phones | New | Errors\n"]
                 history_lines.append("-" * 70 + "\n")
                 
@@ -345,14 +543,7 @@ class App(ctk.CTk):
                     history_lines.append(line)
                 
                 history_text = "".join(history_lines) if history else "No runs yet\n"
-                
-                def update_history():
-                    self.history_text.configure(state="normal")
-                    self.history_text.delete("1.0", "end")
-                    self.history_text.insert("1.0", history_text)
-                    self.history_text.configure(state="disabled")
-                
-                self.after(0, update_history)
+                self._ui_q.put(('call', partial(self._apply_history, history_text)))
                 
                 logging.info("Dashboard refreshed")
                 
@@ -363,9 +554,15 @@ class App(ctk.CTk):
                     db.close()
         
         # Запускаем в отдельном потоке
-        import threading
-        threading.Thread(target=do_refresh, daemon=True).start()
+        self._io_pool.submit(do_refresh)
     
+    def _apply_history(self, history_text: str):
+        """Вывод таблицы истории запусков (из главного потока)."""
+        self.history_text.configure(state="normal")
+        self.history_text.delete("1.0", "end")
+        self.history_text.insert("1.0", history_text)
+        self.history_text.configure(state="disabled")
+
     def draw_collection_graph(self, runs_data: list):
         """Отрисовка графика динамики сбора."""
         if not runs_data or len(runs_data) < 2:
@@ -458,7 +655,7 @@ class App(ctk.CTk):
         self.parallel_info_label = ctk.CTkLabel(
             settings_frame,
             text="ℹ️ Parallel mode uses multiple threads to speed up collection",
-            font=ctk.CTkFont(size=10),
+            font=self._font(10),
             text_color="gray"
         )
         self.parallel_info_label.grid(row=2, column=2, columnspan=2, padx=10, pady=5, sticky="w")
@@ -493,17 +690,19 @@ class App(ctk.CTk):
         progress_frame = ctk.CTkFrame(self.tab_collection)
         progress_frame.pack(pady=10, padx=20, fill="x")
 
-        self.progress_label = ctk.CTkLabel(progress_frame, text="Ready to start", font=ctk.CTkFont(size=12))
+        self._progress_text_var = ctk.StringVar(value="Ready to start")
+        self.progress_label = ctk.CTkLabel(progress_frame, textvariable=self._progress_text_var, font=self._font(12))
         self.progress_label.pack(pady=5)
 
         self.progress_bar = ctk.CTkProgressBar(progress_frame, width=800)
         self.progress_bar.pack(pady=5)
         self.progress_bar.set(0)
 
+        self._stats_var = ctk.StringVar(value="Total: 0 | New: 0 | Errors: 0")
         self.stats_label = ctk.CTkLabel(
             progress_frame, 
-            text="Total: 0 | New: 0 | Errors: 0",
-            font=ctk.CTkFont(size=14, weight="bold")
+            textvariable=self._stats_var,
+            font=self._font(14, "bold")
         )
         self.stats_label.pack(pady=5)
 
@@ -511,7 +710,7 @@ class App(ctk.CTk):
         logs_frame = ctk.CTkFrame(self.tab_collection)
         logs_frame.pack(pady=10, padx=20, fill="both", expand=True)
 
-        ctk.CTkLabel(logs_frame, text="Logs:", font=ctk.CTkFont(size=12, weight="bold")).pack(anchor="w", padx=5, pady=5)
+        ctk.CTkLabel(logs_frame, text="Logs:", font=self._font(12, "bold")).pack(anchor="w", padx=5, pady=5)
         self.log_text = ctk.CTkTextbox(
             logs_frame, 
             height=200, 
@@ -526,7 +725,7 @@ class App(ctk.CTk):
 
 
         # Add logging handler for GUI
-        text_handler = TextHandler(self.log_text)
+        text_handler = self._text_handler = TextHandler(self.log_text)
 
         # Более читаемый формат с переносом
         formatter = logging.Formatter(
@@ -535,10 +734,8 @@ class App(ctk.CTk):
         )
         text_handler.setFormatter(formatter)
 
-        # Добавляем handler только если его ещё нет
-        logger = logging.getLogger()
-        if not any(isinstance(h, TextHandler) for h in logger.handlers):
-            logger.addHandler(text_handler)
+        # Обслуживается QueueListener вместе с файловым и консольным handler
+        self._log_handlers.append(text_handler)
 
 
     def create_export_tab(self):
@@ -547,7 +744,7 @@ class App(ctk.CTk):
         
         ctk.CTkLabel(
             export_frame, text="Export Data", 
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=self._font(18, "bold")
         ).pack(pady=20)
         
         # CSV Export Section
@@ -557,7 +754,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             csv_section, 
             text="📄 CSV Export",
-            font=ctk.CTkFont(size=14, weight="bold")
+            font=self._font(14, "bold")
         ).pack(pady=10)
         
         ctk.CTkButton(
@@ -575,7 +772,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             db_section, 
             text="💾 Database Export",
-            font=ctk.CTkFont(size=14, weight="bold")
+            font=self._font(14, "bold")
         ).pack(pady=10)
         
         ctk.CTkButton(
@@ -591,7 +788,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(
             db_section,
             text="ℹ️ Creates a new .db file with only unique phone numbers",
-            font=ctk.CTkFont(size=10),
+            font=self._font(10),
             text_color="gray"
         ).pack(pady=5)
         
@@ -599,7 +796,7 @@ class App(ctk.CTk):
         self.export_status = ctk.CTkLabel(
             export_frame, 
             text="", 
-            font=ctk.CTkFont(size=11)
+            font=self._font(11)
         )
         self.export_status.pack(pady=20)
 
@@ -609,7 +806,7 @@ class App(ctk.CTk):
 
         ctk.CTkLabel(
             settings_frame, text="Settings", 
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=self._font(18, "bold")
         ).pack(pady=20)
 
         # Rate Limit
@@ -629,7 +826,7 @@ class App(ctk.CTk):
         telegram_label = ctk.CTkLabel(
             settings_frame, 
             text="Telegram Notifications", 
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         telegram_label.pack(pady=(20, 10))
 
@@ -665,10 +862,9 @@ class App(ctk.CTk):
         telegram_token_frame = ctk.CTkFrame(settings_frame)
         telegram_token_frame.pack(pady=5, fill="x", padx=20)
         ctk.CTkLabel(telegram_token_frame, text="Bot Token:").pack(side="left", padx=10)
-        token_display = "***" + (self.telegram_token[-10:] if self.telegram_token and len(self.telegram_token) > 10 else "NOT SET")
         ctk.CTkLabel(
             telegram_token_frame, 
-            text=token_display,
+            text=self._token_display,
             text_color="gray"
         ).pack(side="left", padx=10)
 
@@ -687,7 +883,7 @@ class App(ctk.CTk):
         parallel_label = ctk.CTkLabel(
             settings_frame, 
             text="Parallel Processing", 
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._font(16, "bold")
         )
         parallel_label.pack(pady=(20, 10))
 
@@ -723,7 +919,7 @@ class App(ctk.CTk):
         parallel_info = ctk.CTkLabel(
             settings_frame,
             text="ℹ️ More workers = faster collection, but higher API load",
-            font=ctk.CTkFont(size=10),
+            font=self._font(10),
             text_color="gray",
             wraplength=400
         )
@@ -741,10 +937,11 @@ class App(ctk.CTk):
         save_parallel_btn.pack(pady=10)
 
     def start_collection(self):
-        if self.is_collecting:
+        if self._running_event.is_set():
             return
         
-        self.is_collecting = True
+        self._stop_event.clear()
+        self._running_event.set()
         self.btn_start.configure(state="disabled")
         self.btn_stop.configure(state="normal")
         self.btn_continue.configure(state="disabled")
@@ -754,101 +951,168 @@ class App(ctk.CTk):
         limit_projects = self.parse_int(self.limit_projects_var.get())
         max_pages = self.parse_int(self.max_pages_var.get())
 
-        self.collection_thread = threading.Thread(
-            target=self.run_collection, 
-            args=(limit_clients, limit_projects, max_pages, False),
-            daemon=True
+        self._collection_future = self._collection_pool.submit(
+            self.run_collection, self._current_run_config(),
+            limit_clients, limit_projects, max_pages, False
         )
-        self.collection_thread.start()
 
     def continue_collection(self):
-        if self.is_collecting:
+        if self._running_event.is_set():
             return
             
-        self.is_collecting = True
+        self._stop_event.clear()
+        self._running_event.set()
         self.btn_start.configure(state="disabled")
         self.btn_stop.configure(state="normal")
         self.btn_continue.configure(state="disabled")
 
-        self.collection_thread = threading.Thread(
-            target=self.run_collection, 
-            args=(None, None, None, True),
-            daemon=True
+        self._collection_future = self._collection_pool.submit(
+            self.run_collection, self._current_run_config(), None, None, None, True
         )
-        self.collection_thread.start()
 
     def stop_collection(self):
-        self.is_collecting = False
+        self._stop_event.set()
         self.btn_stop.configure(state="disabled")
-        self.progress_label.configure(text="Stopping... please wait")
+        self._set_progress_text("Stopping... please wait")
         logging.info("STOP: User requested termination")
 
     def progress_callback(self, current, total, stats):
         """Callback to update UI progress"""
-        def update():
-            # Прогресс бар
-            if total > 0:
-                val = current / total
-                self.progress_bar.set(val)
-                self.progress_label.configure(text=f"Client {current} of {total}")
-            
-            # Статистика с активными воркерами
-            active_workers = stats.get('active_workers', 0)
-            worker_info = f" | 🔄 Active: {active_workers}" if active_workers > 0 else ""
-            
-            self.stats_label.configure(
-                text=f"Total: {stats.get('total_phones', 0)} | New: {stats.get('new_phones', 0)} | Errors: {stats.get('errors_count', 0)}{worker_info}"
-            )
-        
-        try:
-            self.after(0, update)
-        except Exception:
-            pass
+        # Только подменяем ссылку (атомарно под GIL) — промежуточные состояния
+        # отбросит _flush_progress, отрисовка не чаще ~30 раз в секунду
+        self._last_progress = (current, total, dict(stats))
+
+    def _flush_progress(self):
+        """Отрисовка последнего состояния прогресса, если оно ещё не показано."""
+        state = self._last_progress
+        if state is not None and state is not self._shown_progress:
+            self._shown_progress = state
+            self._render_progress(*state)
+
+    def _drain_queue(self):
+        """Разбор сообщений от рабочих потоков в главном потоке (раз в 33 мс)."""
+        self._flush_progress()
+
+        while True:
+            try:
+                item = self._ui_q.get_nowait()
+            except queue.Empty:
+                break
+            tag = item[0]
+            if tag == 'export_status':
+                self.export_status.configure(text=item[1])
+            elif tag == 'complete':
+                self.collection_complete(item[1], item[2])
+            elif tag == 'call':
+                item[1]()
+
+        self._drain_job = self.after(_UI_POLL_MS, self._drain_queue)
+
+    def _render_progress(self, current, total, stats):
+        """Отрисовка прогресса (только из главного потока)."""
+        # Прогресс бар
+        if total > 0:
+            self._set_progress_bar(current / total)
+            self._set_progress_text(f"Client {current} of {total}")
+        
+        # Статистика с активными воркерами
+        active_workers = stats.get('active_workers', 0)
+        worker_info = f" | 🔄 Active: {active_workers}" if active_workers else ""
+        
+        stats_text = self._stats_tmpl.format_map({
+            'total_phones': stats.get('total_phones', 0),
+            'new_phones': stats.get('new_phones', 0),
+            'errors_count': stats.get('errors_count', 0),
+            'worker_info': worker_info,
+        })
+        if stats_text != self._stats_text:
+            self._stats_text = stats_text
+            self._stats_var.set(stats_text)
+
+    def _set_progress_text(self, text: str):
+        if text != self._progress_text:
+            self._progress_text = text
+            self._progress_text_var.set(text)
+
+    def _set_progress_bar(self, value: float):
+        if abs(value - self._bar_value) > 1e-4:
+            self._bar_value = value
+            self.progress_bar.set(value)
+
+    def _current_run_config(self) -> RunConfig:
+        """Снимок настроек из GUI; tk-переменные читаем только в главном потоке."""
+        chat_id = self.telegram_chat_id_var.get().strip()
+        return RunConfig(
+            api_url=self.api_url,
+            api_token=self.api_token,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            rate_limit=self.rate_limit,
+            telegram_token=self.telegram_token,
+            telegram_chat_id=chat_id or None,
+            telegram_enabled=self.telegram_enabled_var.get() == "yes",
+            parallel=self.parallel_mode_var.get() == "yes",
+            workers=self.parse_int(self.workers_var.get()) or 5,
+        )
 
-    def run_collection(self, limit_clients, limit_projects, max_pages, resume):
-        api_client = None
-        db = None
+    def _get_api_client(self, cfg: RunConfig):
+        """DataMasterClient с тёплым пулом соединений; пересоздаётся при смене настроек."""
+        from src.api.client import DataMasterClient
+        
+        key = (cfg.api_url, cfg.api_token, cfg.timeout, cfg.max_retries)
+        if self._api_client is None or key != self._api_client_key:
+            if self._api_client:
+                self._api_client.close()
+            self._api_client = DataMasterClient(*key, stop_event=self._stop_event)
+            self._api_client_key = key
+        return self._api_client
+
+    def _get_notifier(self, cfg: RunConfig):
+        """TelegramNotifier для текущего токена и Chat ID (кэшируется)."""
+        from src.notifications.telegram_bot import TelegramNotifier
+        
+        key = (cfg.telegram_token, cfg.telegram_chat_id)
+        if self._notifier is None or key != self._notifier_key:
+            if self._notifier:
+                self._notifier.close()
+            self._notifier = TelegramNotifier(*key, enabled=True, blocking=False)
+            self._notifier_key = key
+        return self._notifier
+
+    def run_collection(self, cfg: RunConfig, limit_clients, limit_projects, max_pages, resume):
+        from src.collector.state_manager import StateManager
+        from src.collector.orchestrator import CollectionOrchestrator
+        from src.collector.parallel_orchestrator import ParallelOrchestrator
+        
         try:
-            # Init API and DB
-            api_client = DataMasterClient(self.api_url, self.api_token, self.timeout, self.max_retries)
-            db = DatabaseManager(self.db_path)
-            db.connect()
+            # API-клиент и БД общие для приложения и не закрываются после сбора
+            api_client = self._get_api_client(cfg)
+            db = self._get_db()
             state_manager = StateManager()
             
             # Инициализация Telegram notifier
             notifier = None
-            
-            # Берём актуальный Chat ID из GUI (если изменён)
-            current_chat_id = self.telegram_chat_id_var.get().strip() if hasattr(self, 'telegram_chat_id_var') else self.telegram_chat_id
-            current_enabled = (self.telegram_enabled_var.get() == "yes") if hasattr(self, 'telegram_enabled_var') else self.telegram_enabled
 
             # logging.info(f"Telegram settings: enabled={self.telegram_enabled}, token={bool(self.telegram_token)}, chat_id={bool(self.telegram_chat_id)}") #Логи по телеграмм уведомлениям
 
-            if current_enabled and self.telegram_token and current_chat_id:
-                notifier = TelegramNotifier(
-                    self.telegram_token,
-                    current_chat_id,
-                    enabled=True
-                )
+            if cfg.telegram_enabled and cfg.telegram_token and cfg.telegram_chat_id:
+                notifier = self._get_notifier(cfg)
                 logging.info(f"Telegram notifications enabled. Notifier created: {notifier}")
             else:
-                logging.warning(f"Telegram notifications NOT enabled. Check: enabled={self.telegram_enabled}, token={'***' if self.telegram_token else 'MISSING'}, chat_id={self.telegram_chat_id}")
+                logging.warning(f"Telegram notifications NOT enabled. Check: enabled={cfg.telegram_enabled}, token={'***' if cfg.telegram_token else 'MISSING'}, chat_id={cfg.telegram_chat_id}")
 
             # Выбор режима работы (параллельный или обычный)
-            parallel_mode = (self.parallel_mode_var.get() == "yes") if hasattr(self, 'parallel_mode_var') else self.parallel_enabled
-            workers = self.parse_int(self.workers_var.get()) if hasattr(self, 'workers_var') else self.workers_count
-
-            if parallel_mode:
+            if cfg.parallel:
                 # Используем параллельный orchestrator
                 orchestrator = ParallelOrchestrator(
-                    api_client, db, self.rate_limit, state_manager, notifier,
-                    workers=workers or 5
+                    api_client, db, cfg.rate_limit, state_manager, notifier,
+                    workers=cfg.workers
                 )
                 # logging.info(f"ParallelOrchestrator created with {workers} workers, notifier: {orchestrator.notifier}") # Логи уведомления Telegram (выключены)
             else:
                 # Используем обычный orchestrator
                 orchestrator = CollectionOrchestrator(
-                    api_client, db, self.rate_limit, state_manager, notifier
+                    api_client, db, cfg.rate_limit, state_manager, notifier
                 )
                 # logging.info(f"CollectionOrchestrator created with notifier: {orchestrator.notifier}") # Логи уведомления Telegram (выключены)
 
@@ -859,7 +1123,8 @@ class App(ctk.CTk):
                 max_pages=max_pages,
                 resume=resume,
                 progress_callback=self.progress_callback,
-                stop_callback=lambda: not self.is_collecting
+                # stop_callback оркестратор берёт из stop_event.is_set
+                stop_event=self._stop_event
             )
 
             if result == "stopped":
@@ -867,62 +1132,55 @@ class App(ctk.CTk):
             else:
                 msg = "✅ Collection successfully completed"
             
-            self.after(0, lambda: self.collection_complete(True, msg))
+            self._ui_q.put(('complete', True, msg))
 
         except Exception as e:
             logging.error(f"FATAL: {e}")
-            self.after(0, lambda: self.collection_complete(False, f"❌ Error: {e}"))
+            self._ui_q.put(('complete', False, f"❌ Error: {e}"))
         finally:
-            if api_client: api_client.close()
-            if db: db.close()
-            self.is_collecting = False
+            self._running_event.clear()
 
     def collection_complete(self, success, message):
+        # Финальная отрисовка состояния, которое ещё не успел забрать _drain_queue
+        self._flush_progress()
+
         self.btn_start.configure(state="normal")
         self.btn_stop.configure(state="disabled")
         self.btn_continue.configure(state="normal")
-        self.progress_label.configure(text=message)
+        self._set_progress_text(message)
         if success:
-            self.progress_bar.set(1.0)
+            self._set_progress_bar(1.0)
         
         if hasattr(self, 'refresh_dashboard'):
             self.refresh_dashboard()
             
     def export_data_phones(self):
         def do_export():
-            db = None
             try:
-                self.after(0, lambda: self.export_status.configure(text="Exporting..."))
-                db = DatabaseManager(self.db_path)
-                db.connect()
-                exporter = CSVExporter(db)
+                self._ui_q.put(('export_status', "Exporting..."))
+                exporter = self._get_exporter()
                 
                 filepath = exporter.export_all_phones()
                 msg = f"✅ Exported: {os.path.basename(filepath)}"
                 
-                self.after(0, lambda: self.export_status.configure(text=msg))
+                self._ui_q.put(('export_status', msg))
                 logging.info(msg)
             except Exception as e:
                 err_msg = f"❌ Export failed: {e}"
-                self.after(0, lambda: self.export_status.configure(text=err_msg))
+                self._ui_q.put(('export_status', err_msg))
                 logging.error(err_msg)
-            finally:
-                if db: db.close()
 
-        threading.Thread(target=do_export, daemon=True).start()
+        self._submit_export(do_export)
 
     def export_phone_base(self):
         """Экспорт SQL базы только с уникальными номерами."""
         def do_export():
-            db = None
             try:
-                self.after(0, lambda: self.export_status.configure(text="Exporting phone base..."))
+                self._ui_q.put(('export_status', "Exporting phone base..."))
                 
-                db = DatabaseManager(self.db_path)
-                db.connect()
+                db = self._get_db()
                 
                 # Генерируем имя файла с датой
-                from datetime import datetime
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 export_filename = f"phones_base_{timestamp}.db"
                 export_path = os.path.join("data", "exports", export_filename)
@@ -937,17 +1195,21 @@ class App(ctk.CTk):
                     msg = f"❌ Export failed: {result['error']}"
                     logging.error(msg)
                 
-                self.after(0, lambda: self.export_status.configure(text=msg))
+                self._ui_q.put(('export_status', msg))
                 
             except Exception as e:
                 err_msg = f"❌ Export failed: {e}"
-                self.after(0, lambda: self.export_status.configure(text=err_msg))
+                self._ui_q.put(('export_status', err_msg))
                 logging.error(err_msg)
-            finally:
-                if db:
-                    db.close()
         
-        threading.Thread(target=do_export, daemon=True).start()
+        self._submit_export(do_export)
+
+    def _submit_export(self, job):
+        """Запуск экспорта в пуле; клики во время активного экспорта игнорируются."""
+        if self._export_future is not None and not self._export_future.done():
+            logging.info("Export already in progress, please wait")
+            return
+        self._export_future = self._io_pool.submit(job)
 
     def save_settings(self):
         """Сохранение настроек из GUI."""
@@ -967,7 +1229,8 @@ class App(ctk.CTk):
             self.telegram_enabled = new_enabled
             
             # Сохраняем в .env файл
-            self.update_env_file()
+            flag = "true" if new_enabled else "false"
+            self._write_env({'TELEGRAM_CHAT_ID': new_chat_id, 'TELEGRAM_ENABLED': flag})
             
             logging.info(f"Settings saved: Telegram enabled={new_enabled}, Chat ID={new_chat_id}")
             self.show_message("Success", "Settings saved successfully!", "success")
@@ -990,11 +1253,15 @@ class App(ctk.CTk):
                 return
             
             # Обновляем переменные экземпляра
+            workers = new_workers or 5
             self.parallel_enabled = new_parallel_enabled
-            self.workers_count = new_workers or 5
+            self.workers_count = workers
             
             # Сохраняем в .env файл
-            self.update_parallel_env()
+            self._write_env({
+                'PARALLEL_ENABLED': "true" if new_parallel_enabled else "false",
+                'WORKERS_COUNT': str(workers),
+            })
             
             logging.info(f"Parallel settings saved: enabled={new_parallel_enabled}, workers={self.workers_count}")
             self.show_message("Success", "Parallel settings saved successfully!", "success")
@@ -1003,89 +1270,61 @@ class App(ctk.CTk):
             logging.error(f"Failed to save parallel settings: {e}")
             self.show_message("Error", f"Failed to save: {e}", "error")
 
-    def update_parallel_env(self):
-        """Обновление .env файла с настройками параллелизации."""
-        from pathlib import Path
-        
-        env_path = Path(".env")
-        
-        # Читаем существующий .env
-        lines = []
-        if env_path.exists():
-            with open(env_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        
-        # Обновляем нужные строки
-        updated_parallel = False
-        updated_workers = False
-        
-        for i, line in enumerate(lines):
-            if line.startswith('PARALLEL_ENABLED='):
-                lines[i] = f'PARALLEL_ENABLED={"true" if self.parallel_enabled else "false"}\n'
-                updated_parallel = True
-            elif line.startswith('WORKERS_COUNT='):
-                lines[i] = f'WORKERS_COUNT={self.workers_count}\n'
-                updated_workers = True
-        
-        # Добавляем, если не было
-        if not updated_parallel:
-            lines.append(f'PARALLEL_ENABLED={"true" if self.parallel_enabled else "false"}\n')
-        if not updated_workers:
-            lines.append(f'WORKERS_COUNT={self.workers_count}\n')
-        
-        # Записываем обратно
-        with open(env_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
-
-    def update_env_file(self):
-        """Обновление .env файла с новыми настройками."""
-        import os
-        from pathlib import Path
-        
-        env_path = Path(".env")
-        
-        # Читаем существующий .env
-        lines = []
-        if env_path.exists():
-            with open(env_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        
-        # Обновляем нужные строки
-        updated_chat_id = False
-        updated_enabled = False
-        
-        for i, line in enumerate(lines):
-            if line.startswith('TELEGRAM_CHAT_ID='):
-                lines[i] = f'TELEGRAM_CHAT_ID={self.telegram_chat_id}\n'
-                updated_chat_id = True
-            elif line.startswith('TELEGRAM_ENABLED='):
-                lines[i] = f'TELEGRAM_ENABLED={"true" if self.telegram_enabled else "false"}\n'
-                updated_enabled = True
-        
-        # Добавляем, если не было
-        if not updated_chat_id:
-            lines.append(f'TELEGRAM_CHAT_ID={self.telegram_chat_id}\n')
-        if not updated_enabled:
-            lines.append(f'TELEGRAM_ENABLED={"true" if self.telegram_enabled else "false"}\n')
-        
-        # Записываем обратно
-        with open(env_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+    def _env_file_mtime(self):
+        try:
+            return self._env_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_env_cache(self):
+        """Чтение .env в список строк и индекс ключ -> номер строки."""
+        self._env_lines = []       # исходные строки (с комментариями и пустыми)
+        self._env_line_index = {}  # ключ -> индекс в _env_lines
+        self._env_mtime = self._env_file_mtime()
+        if self._env_mtime is None:
+            return
+        with open(self._env_path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                line = line.rstrip('\n')
+                self._env_lines.append(line)
+                key, sep, _ = line.partition('=')
+                if sep and not key.lstrip().startswith('#'):
+                    self._env_line_index[key] = i
+
+    def _write_env(self, updates: dict):
+        """Обновление ключей .env: O(1) на ключ по индексу строк, одна запись."""
+        tmp_path = self._env_path.with_name(self._env_path.name + ".tmp")
+        
+        with self._env_lock:
+            # Файл изменили извне — перечитываем, чтобы не затереть правки
+            if self._env_file_mtime() != self._env_mtime:
+                self._load_env_cache()
+            
+            for key, value in updates.items():
+                line = f"{key}={value}"
+                idx = self._env_line_index.get(key)
+                if idx is None:
+                    self._env_line_index[key] = len(self._env_lines)
+                    self._env_lines.append(line)
+                else:
+                    self._env_lines[idx] = line
+            
+            # Пишем во временный файл и атомарно подменяем .env
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(line + '\n' for line in self._env_lines)
+            os.replace(tmp_path, self._env_path)
+            self._env_mtime = self._env_file_mtime()
 
     def show_message(self, title: str, message: str, msg_type: str = "info"):
         """Показ всплывающего сообщения."""
-        import tkinter.messagebox as messagebox
-        
-        if msg_type == "success":
-            messagebox.showinfo(title, message)
-        elif msg_type == "error":
-            messagebox.showerror(title, message)
-        else:
-            messagebox.showinfo(title, message)
-
-    def parse_int(self, value):
+        _MESSAGE_BOXES.get(msg_type, messagebox.showinfo)(title, message)
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def parse_int(value):
         try:
-            return int(value) if value and str(value).strip() else None
+            # StringVar.get() уже возвращает str — лишний str() не нужен
+            return int(value) if isinstance(value, int) or (value and value.strip()) else None
         except ValueError:
             return None
 
@@ -1,38 +1,109 @@
+import html
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from datetime import datetime
+from time import monotonic, time
 import requests
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:  # orjson не установлен — стандартный json
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
 logger = logging.getLogger(__name__)
 
+# (секунда, строка): strftime вызывается не чаще раза в секунду
+_ts_cache = (0, "")
+
+
+def _now_str() -> str:
+    """Текущее время в формате '%Y-%m-%d %H:%M:%S' (кэш на одну секунду)."""
+    global _ts_cache
+    t = int(time())
+    cached = _ts_cache
+    if cached[0] != t:
+        cached = _ts_cache = (t, datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S'))
+    return cached[1]
+
+
+# Шаблоны уведомлений (HTML), заполняются через format_map
+_START_TMPL = (
+    "🚀 <b>Запуск #{run_id}</b>\n\n"
+    "📊 Клиентов: {clients_count}\n"
+    "🕐 Старт: {started_at}"
+)
+_PROGRESS_TMPL = (
+    "📈 <b>Прогресс #{run_id}</b>\n\n"
+    "✅ Обработано: {processed}/{total} ({percent:.1f}%)\n"
+    "📁 Проектов собрано: {projects}\n"
+    "📞 Номеров найдено: {numbers}"
+)
+_ERROR_TMPL = (
+    "❌ <b>Ошибка #{run_id}</b>{client_info}\n\n"
+    "<code>{error_msg}</code>"
+)
+_FINISH_TMPL = (
+    "✅ <b>Завершено #{run_id}</b>\n\n"
+    "📊 Клиентов обработано: {clients_processed}\n"
+    "📁 Проектов найдено: {projects_found}\n"
+    "📞 Номеров собрано: {numbers_found}\n"
+    "⏱ Время выполнения: {duration_min:.1f} мин\n"
+    "❌ Ошибок: {errors_count}"
+)
+
 
 class TelegramNotifier:
     """Упрощённый Telegram-уведомитель через requests (без async)."""
     
-    def __init__(self, token: str, chat_id: str, enabled: bool = True):
+    # Часы для cooldown ошибок (монотонные, не зависят от перевода времени)
+    _CLOCK = staticmethod(monotonic)
+    
+    def __init__(self, token: str, chat_id: str, enabled: bool = True, blocking: bool = True):
         self.token = token
         self.chat_id = chat_id
         self.enabled = enabled
         self.base_url = f"https://api.telegram.org/bot{token}"
-        self.last_error_time = 0  # ← Добавь
+        self._send_url = f"{self.base_url}/sendMessage"
+        self.last_error_time = float('-inf')  # по часам _CLOCK; первая ошибка проходит всегда
         self.error_cooldown = 10  # ← Минимум 10 сек между ошибками
         
+        # Keep-alive: одно TLS-соединение с api.telegram.org на все уведомления
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        
+        # blocking=False: отправка в отдельном потоке, сбор не ждёт ответа Telegram.
+        # Один поток сохраняет порядок сообщений
+        self._sender = None if blocking else ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="telegram"
+        )
+        
         if not self.enabled:
             logger.info("Telegram notifications disabled")
     
     def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
-        """Отправка текстового сообщения."""
+        """Отправка текстового сообщения (в фоне — True означает «поставлено в очередь»)."""
         if not self.enabled:
             return False
         
+        if self._sender is not None:
+            self._sender.submit(self._post, text, parse_mode)
+            return True
+        return self._post(text, parse_mode)
+    
+    def _post(self, text: str, parse_mode: str) -> bool:
         try:
-            url = f"{self.base_url}/sendMessage"
             payload = {
                 "chat_id": self.chat_id,
                 "text": text,
                 "parse_mode": parse_mode
             }
-            response = requests.post(url, json=payload, timeout=10)
+            # Тело сериализуем сами (orjson быстрее json); Content-Type задан в сессии
+            response = self.session.post(self._send_url, data=_dumps(payload), timeout=10)
             response.raise_for_status()
             logger.debug(f"Telegram message sent: {text[:50]}...")
             return True
@@ -40,55 +111,80 @@ class TelegramNotifier:
             logger.error(f"Failed to send Telegram message: {e}")
             return False
     
+    def close(self):
+        """Закрытие HTTP-сессии (после отправки всех сообщений из очереди)."""
+        if self._sender is not None:
+            self._sender.shutdown(wait=True)
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
     def notify_start(self, run_id: int, clients_count: int) -> bool:
         """Уведомление о старте сбора."""
-        text = (
-            f"🚀 <b>Запуск #{run_id}</b>\n\n"
-            f"📊 Клиентов: {clients_count}\n"
-            f"🕐 Старт: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        )
+        if not self.enabled:
+            return False
+        
+        text = _START_TMPL.format_map({
+            'run_id': run_id,
+            'clients_count': clients_count,
+            'started_at': _now_str(),
+        })
         return self.send_message(text)
     
     def notify_progress(self, run_id: int, processed: int, total: int, 
                        projects: int, numbers: int) -> bool:
         """Уведомление о прогрессе."""
+        if not self.enabled:
+            return False
+        
         percent = (processed / total * 100) if total > 0 else 0
-        text = (
-            f"📈 <b>Прогресс #{run_id}</b>\n\n"
-            f"✅ Обработано: {processed}/{total} ({percent:.1f}%)\n"
-            f"📁 Проектов собрано: {projects}\n"
-            f"📞 Номеров найдено: {numbers}"
-        )
+        text = _PROGRESS_TMPL.format_map({
+            'run_id': run_id,
+            'processed': processed,
+            'total': total,
+            'percent': percent,
+            'projects': projects,
+            'numbers': numbers,
+        })
         return self.send_message(text)
     
     def notify_error(self, run_id: int, error_msg: str, client_id: Optional[int] = None) -> bool:
         """Уведомление об ошибке с защитой от спама."""
-        import time
+        if not self.enabled:
+            return False
         
         # Проверка cooldown
-        current_time = time.time()
-        if current_time - self.last_error_time < self.error_cooldown:
+        now = self._CLOCK()
+        if now - self.last_error_time < self.error_cooldown:
             logger.debug("Skipping error notification due to cooldown")
             return False
         
-        self.last_error_time = current_time
+        self.last_error_time = now
         
         client_info = f" (Клиент #{client_id})" if client_id else ""
-        text = (
-            f"❌ <b>Ошибка #{run_id}</b>{client_info}\n\n"
-            f"de>{error_msg[:300]}</code>"
-        )
+        text = _ERROR_TMPL.format_map({
+            'run_id': run_id,
+            'client_info': client_info,
+            'error_msg': html.escape(error_msg[:300]),
+        })
         return self.send_message(text)
     
     def notify_finish(self, run_id: int, stats: dict) -> bool:
         """Уведомление о завершении."""
+        if not self.enabled:
+            return False
+        
         duration_min = stats.get('duration_seconds', 0) / 60
-        text = (
-            f"✅ <b>Завершено #{run_id}</b>\n\n"
-            f"📊 Клиентов обработано: {stats.get('clients_processed', 0)}\n"
-            f"📁 Проектов найдено: {stats.get('projects_found', 0)}\n"
-            f"📞 Номеров собрано: {stats.get('numbers_found', 0)}\n"
-            f"⏱ Время выполнения: {duration_min:.1f} мин\n"
-            f"❌ Ошибок: {stats.get('errors_count', 0)}"
-        )
+        text = _FINISH_TMPL.format_map({
+            'run_id': run_id,
+            'clients_processed': stats.get('clients_processed', 0),
+            'projects_found': stats.get('projects_found', 0),
+            'numbers_found': stats.get('numbers_found', 0),
+            'duration_min': duration_min,
+            'errors_count': stats.get('errors_count', 0),
+        })
         return self.send_message(text)
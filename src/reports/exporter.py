@@ -1,133 +1,176 @@
 """CSV Exporter for phone data"""
 import csv
+import gzip
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict
 from src.database.manager import DatabaseManager
 
+# Буфер записи CSV: 1 МБ вместо 8 КБ по умолчанию — меньше системных вызовов write()
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Совпадает с lineterminator по умолчанию у csv.writer
+_CSV_EOL = '\r\n'
+
+
+def _write_plain_rows(f, writer, rows: list) -> None:
+    """
+    Запись строк простым join без csv-экранирования.
+    
+    Строки, где какое-то поле содержит запятую, кавычку или перевод строки,
+    уходят в csv.writer, поэтому результат побайтно совпадает с writer.writerows.
+    """
+    lines = []
+    for row in rows:
+        line = ','.join(['' if v is None else str(v) for v in row])
+        if line.count(',') == len(row) - 1 and '"' not in line and '\n' not in line and '\r' not in line:
+            lines.append(line)
+            continue
+        
+        if lines:
+            f.write(_CSV_EOL.join(lines) + _CSV_EOL)
+            lines = []
+        writer.writerow(row)
+    
+    if lines:
+        f.write(_CSV_EOL.join(lines) + _CSV_EOL)
+
 
 class CSVExporter:
-    def __init__(self, db: DatabaseManager, export_dir: str = "data/exports"):
+    def __init__(self, db: DatabaseManager, export_dir: str = "data/exports", fetch_size: int = 10_000,
+                 compress: bool = False):
         self.db = db
         self.export_dir = export_dir
+        self.fetch_size = fetch_size  # строк в пачке fetchmany при выгрузке
+        self.compress = compress      # писать .csv.gz (gzip, уровень 1) вместо .csv
         os.makedirs(export_dir, exist_ok=True)
 
+    def _stream_query_to_csv(self, sql: str, params: tuple, header: List[str], filename: str,
+                             plain: bool = False) -> str:
+        """
+        Потоковая выгрузка результата запроса в CSV пачками по fetch_size строк.
+        
+        plain=True — быстрая запись без csv-экранирования для выборок, где поля
+        почти всегда «чистые» (цифры, даты); особые строки всё равно экранируются.
+        
+        Возвращает итоговое имя файла (с суффиксом .gz при compress=True).
+        """
+        if self.compress:
+            filename += '.gz'
+
+        with self.db.read_cursor(arraysize=self.fetch_size) as cursor:
+            # Обычные кортежи вместо sqlite3.Row: csv.writer нужна только последовательность
+            cursor.row_factory = None
+            # Файл создаём только после успешного execute: ошибка запроса не оставляет пустой CSV
+            cursor.execute(sql, params)
+            
+            try:
+                with self._open_output(filename) as f:
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    while rows := cursor.fetchmany():
+                        if plain:
+                            _write_plain_rows(f, writer, rows)
+                        else:
+                            writer.writerows(rows)
+            except BaseException:
+                # Недописанный файл удаляем
+                try:
+                    os.remove(filename)
+                except OSError:
+                    pass
+                raise
+
+        return filename
+
+    def _open_output(self, filename: str):
+        """Текстовый поток для CSV (gzip уровня 1 при compress=True)."""
+        if self.compress:
+            # Уровень 1: сжатие почти бесплатно по CPU, на диск пишется в разы меньше
+            return gzip.open(filename, 'wt', compresslevel=1, encoding='utf-8-sig', newline='')
+        return open(filename, 'w', newline='', encoding='utf-8-sig', buffering=WRITE_BUFFER_SIZE)
+
     def export_all_phones(self) -> str:
         """Экспорт всех уникальных телефонов"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(self.export_dir, f"phones_all_{timestamp}.csv")
 
-        with self.db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT phone, first_seen_at, original_format, first_run_id
-                FROM phones
-                ORDER BY first_seen_at DESC
-            """)
-            rows = cursor.fetchall()
-
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            writer.writerow(['phone', 'first_seen_at', 'original_format', 'first_run_id'])
-            writer.writerows(rows)
-
-        return filename
+        return self._stream_query_to_csv("""
+            SELECT phone, first_seen_at, original_format, first_run_id
+            FROM phones
+            ORDER BY first_seen_at DESC
+        """, (), ['phone', 'first_seen_at', 'original_format', 'first_run_id'], filename, plain=True)
 
     def export_runs_summary(self) -> str:
         """Экспорт статистики по всем запускам"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(self.export_dir, f"runs_summary_{timestamp}.csv")
 
-        with self.db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    id,
-                    started_at,
-                    completed_at,
-                    status,
-                    total_phones,
-                    new_phones,
-                    errors_count
-                FROM runs
-                ORDER BY started_at DESC
-            """)
-            rows = cursor.fetchall()
-
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'run_id', 'started_at', 'completed_at', 'status',
-                'total_phones', 'new_phones', 'errors_count'
-            ])
-            writer.writerows(rows)
-
-        return filename
+        return self._stream_query_to_csv("""
+            SELECT 
+                id,
+                started_at,
+                completed_at,
+                status,
+                total_phones,
+                new_phones,
+                errors_count
+            FROM runs
+            ORDER BY started_at DESC
+        """, (), [
+            'run_id', 'started_at', 'completed_at', 'status',
+            'total_phones', 'new_phones', 'errors_count'
+        ], filename)
 
     def export_clients_stats(self) -> str:
         """Экспорт статистики по клиентам (топ по количеству номеров)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(self.export_dir, f"clients_stats_{timestamp}.csv")
 
-        with self.db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    c.id,
-                    c.username,
-                    COUNT(DISTINCT p.id) as total_projects,
-                    COUNT(DISTINCT pp.phone_id) as total_phones
-                FROM clients c
-                LEFT JOIN projects p ON c.id = p.client_id
-                LEFT JOIN project_phones pp ON p.id = pp.project_id
-                GROUP BY c.id, c.username
-                HAVING total_phones > 0
-                ORDER BY total_phones DESC
-            """)
-            rows = cursor.fetchall()
-
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            writer.writerow(['client_id', 'username', 'total_projects', 'total_phones'])
-            writer.writerows(rows)
-
-        return filename
+        return self._stream_query_to_csv("""
+            SELECT 
+                c.id,
+                c.username,
+                COUNT(DISTINCT p.id) as total_projects,
+                COUNT(DISTINCT pp.phone_id) as total_phones
+            FROM clients c
+            LEFT JOIN projects p ON c.id = p.client_id
+            LEFT JOIN project_phones pp ON p.id = pp.project_id
+            GROUP BY c.id, c.username
+            HAVING total_phones > 0
+            ORDER BY total_phones DESC
+        """, (), ['client_id', 'username', 'total_projects', 'total_phones'], filename)
 
     def export_latest_run(self, run_id: int = None) -> str:
-        """Экспорт телефонов конкретного запуска"""
+        """Экспорт телефонов конкретного запуска (по умолчанию — последнего)"""
         if run_id is None:
-            with self.db.get_cursor() as cursor:
-                cursor.execute("SELECT MAX(id) FROM runs")
-                run_id = cursor.fetchone()[0]
+            # Последний запуск вычисляется в самом запросе, без отдельного SELECT MAX(id)
+            run_filter, params, run_label = "(SELECT MAX(id) FROM runs)", (), "latest"
+        else:
+            run_filter, params, run_label = "?", (run_id,), run_id
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(self.export_dir, f"phones_run_{run_id}_{timestamp}.csv")
-
-        with self.db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT DISTINCT
-                    p.phone,
-                    p.first_seen_at,
-                    pr.name as project_name,
-                    c.username as client_name
-                FROM phones p
-                JOIN project_phones pp ON p.id = pp.phone_id
-                JOIN projects pr ON pp.project_id = pr.id
-                JOIN clients c ON pr.client_id = c.id
-                WHERE pp.run_id = ?
-                ORDER BY p.first_seen_at DESC
-            """, (run_id,))
-            rows = cursor.fetchall()
-
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            writer.writerow(['phone', 'first_seen_at', 'project_name', 'client_name'])
-            writer.writerows(rows)
-
-        return filename
+        filename = os.path.join(self.export_dir, f"phones_run_{run_label}_{timestamp}.csv")
+        header = ['phone', 'first_seen_at', 'project_name', 'client_name']
+
+        # Денормализованный кэш: заполняется триггером на project_phones,
+        # связи до его появления перенесены при миграции схемы
+        return self._stream_query_to_csv(f"""
+            SELECT DISTINCT phone, first_seen_at, project_name, client_name
+            FROM run_export_cache
+            WHERE run_id = {run_filter}
+            ORDER BY first_seen_at DESC
+        """, params, header, filename)
 
     def export_all(self) -> Dict[str, str]:
-        """Экспорт всех отчётов разом"""
-        return {
-            'all_phones': self.export_all_phones(),
-            'runs_summary': self.export_runs_summary(),
-            'clients_stats': self.export_clients_stats(),
-            'latest_run': self.export_latest_run(),
+        """Экспорт всех отчётов разом (параллельно, каждый на своём курсоре чтения)"""
+        jobs = {
+            'all_phones': self.export_all_phones,
+            'runs_summary': self.export_runs_summary,
+            'clients_stats': self.export_clients_stats,
+            'latest_run': self.export_latest_run,
         }
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="export") as pool:
+            futures = {name: pool.submit(job) for name, job in jobs.items()}
+            return {name: future.result() for name, future in futures.items()}
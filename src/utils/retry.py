@@ -1,17 +1,26 @@
 """Retry decorator with exponential backoff"""
 import time
+import random
 import logging
+import threading
 from functools import wraps
-from typing import Callable, Type, Tuple
+from typing import Callable, Optional, Type, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 
+class RetryAborted(Exception):
+    """Повторные попытки прерваны через stop_event"""
+    pass
+
+
 def retry(
     max_attempts: int = 3,
     delay: float = 2.0,
     backoff: float = 2.0,
-    exceptions: Tuple[Type[Exception], ...] = (Exception,)
+    exceptions: Tuple[Type[Exception], ...] = (Exception,),
+    jitter: float = 0.0,
+    stop_event: Optional[Union[threading.Event, Callable[..., Optional[threading.Event]]]] = None
 ):
     """
     Декоратор для повторных попыток с экспоненциальной задержкой.
@@ -21,12 +30,21 @@ def retry(
         delay: Начальная задержка в секундах
         backoff: Множитель для увеличения задержки (2.0 = каждый раз *2)
         exceptions: Кортеж исключений, при которых делать retry
+        jitter: Случайный разброс задержки (0.5 = ±50%), чтобы параллельные
+            потоки не повторяли запросы одновременно; 0 — без разброса
+        stop_event: Событие остановки: пауза между попытками прерывается сразу
+            после его установки, и вызывается RetryAborted. Вместо события можно
+            передать функцию от аргументов вызова, возвращающую событие (или None),
+            например для методов: lambda self, *args, **kwargs: self.stop_event
     
     Example:
         @retry(max_attempts=3, delay=2, backoff=2)
         def unstable_api_call():
             ...
     """
+    if max_attempts < 1:
+        raise ValueError(f"max_attempts must be >= 1, got {max_attempts}")
+    
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -43,17 +61,30 @@ def retry(
                         )
                         raise
                     
-                    logger.warning(
-                        f"{func.__name__} failed (attempt {attempt}/{max_attempts}): {e}. "
-                        f"Retrying in {current_delay:.1f}s..."
-                    )
+                    sleep_for = current_delay
+                    if jitter:
+                        sleep_for = max(0.0, current_delay * (1 + random.uniform(-jitter, jitter)))
                     
-                    time.sleep(current_delay)
+                    # Ленивое форматирование: строка не собирается, если WARNING отключён
+                    if logger.isEnabledFor(logging.WARNING):
+                        logger.warning(
+                            "%s failed (attempt %d/%d): %s. Retrying in %.1fs...",
+                            func.__name__, attempt, max_attempts, e, sleep_for
+                        )
+                    
+                    event = stop_event
+                    if event is not None and not isinstance(event, threading.Event):
+                        event = event(*args, **kwargs)
+                    
+                    if event is not None:
+                        if event.wait(sleep_for):
+                            raise RetryAborted(
+                                f"{func.__name__}: retries aborted after attempt {attempt}"
+                            ) from e
+                    else:
+                        time.sleep(sleep_for)
                     current_delay *= backoff
                     attempt += 1
-            
-            # На всякий случай (не должно сюда попадать)
-            return func(*args, **kwargs)
         
         return wrapper
     return decorator
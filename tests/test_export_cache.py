@@ -0,0 +1,73 @@
+"""Тесты денормализованного кэша run_export_cache и экспорта запуска."""
+import csv
+import os
+import sys
+
+# Добавляем корневую директорию проекта в путь поиска
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.database.manager import DatabaseManager
+from src.reports.exporter import CSVExporter
+
+
+def _connect(tmp_path) -> DatabaseManager:
+    db = DatabaseManager(str(tmp_path / "phones.db"))
+    db.connect()
+    return db
+
+
+def _add_links(db: DatabaseManager, run_id: int, project_id: int, start: int, count: int):
+    for i in range(start, start + count):
+        phone_id = db.insert_phone(f"7900{i:07d}", f"+7 900 {i}", run_id)
+        db.insert_project_phone(project_id, phone_id, run_id, "2024-01-01 00:00:00")
+
+
+def _read_rows(path: str) -> list:
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))[1:]
+
+
+def test_trigger_fills_cache(tmp_path):
+    db = _connect(tmp_path)
+    try:
+        run_id = db.create_run()
+        db.insert_client(1, "alice")
+        db.insert_project(10, "Project A", 1)
+        _add_links(db, run_id, 10, 0, 3)
+
+        with db.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT phone, project_name, client_name FROM run_export_cache WHERE run_id = ?",
+                (run_id,)
+            )
+            rows = cursor.fetchall()
+
+        assert len(rows) == 3
+        assert {(r['project_name'], r['client_name']) for r in rows} == {("Project A", "alice")}
+    finally:
+        db.close()
+
+
+def test_resumed_run_started_before_cache_is_exported_fully(tmp_path):
+    # Схема до появления кэша: без таблицы и триггера
+    db = _connect(tmp_path)
+    with db.get_cursor() as cursor:
+        cursor.execute("DROP TRIGGER trg_project_phones_export_cache")
+        cursor.execute("DROP TABLE run_export_cache")
+    run_id = db.create_run()
+    db.insert_client(1, "alice")
+    db.insert_project(10, "Project A", 1)
+    _add_links(db, run_id, 10, 0, 5)
+    db.close()
+
+    # Обновлённый код: миграция + продолжение того же запуска (--continue)
+    db = _connect(tmp_path)
+    try:
+        _add_links(db, run_id, 10, 5, 3)
+
+        exporter = CSVExporter(db, str(tmp_path / "exports"))
+        assert len(_read_rows(exporter.export_latest_run(run_id))) == 8
+        assert len(_read_rows(exporter.export_latest_run())) == 8
+    finally:
+        db.close()
@@ -0,0 +1,49 @@
+"""Тесты остановки сбора во время паузы retry."""
+import os
+import sys
+import threading
+
+import pytest
+
+# Добавляем корневую директорию проекта в путь поиска
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.collector.orchestrator import CollectionOrchestrator
+from src.collector.parallel_orchestrator import ParallelOrchestrator
+from src.collector.state_manager import StateManager
+from src.database.manager import DatabaseManager
+from src.utils.retry import retry
+
+
+class UnreachableApi:
+    """API, недоступный при получении списка клиентов; Stop уже нажат."""
+
+    def __init__(self, stop_event: threading.Event):
+        self.stop_event = stop_event
+
+    @retry(max_attempts=3, delay=30.0,
+           stop_event=lambda self, *args, **kwargs: self.stop_event)
+    def get_clients(self):
+        raise ConnectionError("connection refused")
+
+
+@pytest.mark.parametrize("orchestrator_cls", [CollectionOrchestrator, ParallelOrchestrator])
+def test_stop_during_get_clients_retry(tmp_path, orchestrator_cls):
+    stop_event = threading.Event()
+    stop_event.set()
+
+    db = DatabaseManager(str(tmp_path / "phones.db"))
+    db.connect()
+    try:
+        state_manager = StateManager(str(tmp_path / "state.json"))
+        orchestrator = orchestrator_cls(UnreachableApi(stop_event), db, 0, state_manager)
+
+        assert orchestrator.collect(stop_event=stop_event) == "stopped"
+
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT status FROM runs")
+            assert [row['status'] for row in cursor.fetchall()] == ['stopped']
+        assert state_manager.load() is not None
+    finally:
+        db.close()
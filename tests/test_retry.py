@@ -0,0 +1,117 @@
+"""Тесты декоратора retry."""
+import os
+import sys
+import threading
+
+import pytest
+
+# Добавляем корневую директорию проекта в путь поиска
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.utils import retry as retry_module
+from src.utils.retry import retry, RetryAborted
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Подменяет time.sleep и собирает запрошенные паузы."""
+    calls = []
+    monkeypatch.setattr(retry_module.time, "sleep", calls.append)
+    return calls
+
+
+def _flaky(failures: int, exc=ValueError):
+    state = {'calls': 0}
+
+    def func():
+        state['calls'] += 1
+        if state['calls'] <= failures:
+            raise exc("boom")
+        return "ok"
+
+    return func, state
+
+
+def test_success_after_failures(sleeps):
+    func, state = _flaky(2)
+    wrapped = retry(max_attempts=3, delay=1.0, backoff=2.0)(func)
+
+    assert wrapped() == "ok"
+    assert state['calls'] == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_reraises_after_max_attempts(sleeps):
+    func, state = _flaky(10)
+    wrapped = retry(max_attempts=3, delay=1.0)(func)
+
+    with pytest.raises(ValueError):
+        wrapped()
+    assert state['calls'] == 3
+    assert len(sleeps) == 2
+
+
+def test_other_exceptions_are_not_retried(sleeps):
+    func, state = _flaky(1, exc=KeyError)
+    wrapped = retry(max_attempts=3, exceptions=(ValueError,))(func)
+
+    with pytest.raises(KeyError):
+        wrapped()
+    assert state['calls'] == 1
+    assert sleeps == []
+
+
+def test_invalid_max_attempts():
+    with pytest.raises(ValueError):
+        retry(max_attempts=0)
+
+
+def test_jitter_bounds(sleeps):
+    func, _ = _flaky(200)
+    wrapped = retry(max_attempts=201, delay=1.0, backoff=1.0, jitter=0.5)(func)
+
+    assert wrapped() == "ok"
+    assert len(sleeps) == 200
+    assert all(0.5 <= s <= 1.5 for s in sleeps)
+    assert len(set(sleeps)) > 1
+
+
+def test_abort_via_stop_event(sleeps):
+    event = threading.Event()
+    event.set()
+    func, state = _flaky(10)
+    wrapped = retry(max_attempts=5, delay=30.0, stop_event=event)(func)
+
+    with pytest.raises(RetryAborted) as info:
+        wrapped()
+    assert isinstance(info.value.__cause__, ValueError)
+    assert state['calls'] == 1
+    assert sleeps == []
+
+
+def test_stop_event_resolved_per_call(sleeps):
+    class Client:
+        def __init__(self, stop_event):
+            self.stop_event = stop_event
+            self.calls = 0
+
+        @retry(max_attempts=3, delay=30.0,
+               stop_event=lambda self, *args, **kwargs: self.stop_event)
+        def request(self):
+            self.calls += 1
+            raise ValueError("down")
+
+    stopped = threading.Event()
+    stopped.set()
+    client = Client(stopped)
+    with pytest.raises(RetryAborted):
+        client.request()
+    assert client.calls == 1
+
+    # Без события — обычные паузы time.sleep
+    client = Client(None)
+    with pytest.raises(ValueError):
+        client.request()
+    assert client.calls == 3
+    assert sleeps == [30.0, 60.0]
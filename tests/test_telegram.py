@@ -17,10 +17,9 @@ CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 def test_connection():
     """Тест базовой отправки сообщения."""
-    notifier = TelegramNotifier(TOKEN, CHAT_ID)
-    
-    print("Отправка тестового сообщения...")
-    result = notifier.send_message("🧪 <b>Тест подключения</b>\n\nБот работает!")
+    with TelegramNotifier(TOKEN, CHAT_ID) as notifier:
+        print("Отправка тестового сообщения...")
+        result = notifier.send_message("🧪 <b>Тест подключения</b>\n\nБот работает!")
     
     if result:
         print("✅ Сообщение отправлено успешно!")
@@ -32,27 +31,26 @@ def test_connection():
 
 def test_notifications():
     """Тест всех типов уведомлений."""
-    notifier = TelegramNotifier(TOKEN, CHAT_ID)
-    
-    print("\n1. Тест уведомления о старте...")
-    notifier.notify_start(run_id=999, clients_count=50)
-    
-    print("2. Тест уведомления о прогрессе...")
-    notifier.notify_progress(run_id=999, processed=25, total=50, 
-                            projects=100, numbers=250)
-    
-    print("3. Тест уведомления об ошибке...")
-    notifier.notify_error(run_id=999, error_msg="Test error message", client_id=123)
-    
-    print("4. Тест уведомления о завершении...")
-    stats = {
-        'clients_processed': 50,
-        'projects_found': 200,
-        'numbers_found': 500,
-        'duration_seconds': 300,
-        'errors_count': 2
-    }
-    notifier.notify_finish(run_id=999, stats=stats)
+    with TelegramNotifier(TOKEN, CHAT_ID) as notifier:
+        print("\n1. Тест уведомления о старте...")
+        notifier.notify_start(run_id=999, clients_count=50)
+        
+        print("2. Тест уведомления о прогрессе...")
+        notifier.notify_progress(run_id=999, processed=25, total=50, 
+                                projects=100, numbers=250)
+        
+        print("3. Тест уведомления об ошибке...")
+        notifier.notify_error(run_id=999, error_msg="Test error message", client_id=123)
+        
+        print("4. Тест уведомления о завершении...")
+        stats = {
+            'clients_processed': 50,
+            'projects_found': 200,
+            'numbers_found': 500,
+            'duration_seconds': 300,
+            'errors_count': 2
+        }
+        notifier.notify_finish(run_id=999, stats=stats)
     
     print("\n✅ Все тесты завершены! Проверь Telegram.")
 